@@ -4,54 +4,197 @@ Async TCP Service (client)
 import argparse                 # Parse command line args
 import asyncio                  # Async I/O
 import json                     # Encode/decode JSON
+import socket                   # TCP socket options
 import struct                   # Pack/unpack message headers
-from typing import Dict, Any    # Type hints
+from typing import Dict, Any, Optional, Tuple   # Type hints
+
+def _json_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+try:
+    import orjson               # Optional: faster JSON encoding, returns bytes directly
+except ImportError:
+    _dumps = _json_dumps
+else:
+    def _dumps(obj: Any) -> bytes:
+        try:
+            data = orjson.dumps(obj)
+        except TypeError:       # Ints over 64 bits, non-str keys...: the stdlib handles them
+            return _json_dumps(obj)
+        if b"null" in data:     # orjson writes NaN/Infinity as null; let the stdlib keep them
+            return _json_dumps(obj)
+        return data
+
+# Decoding always uses the stdlib: orjson would turn big ints into floats and reject NaN
+_loads = json.loads             # json.loads also accepts UTF-8 bytes
+
+try:
+    from aioconsole import ainput   # Optional: async stdin without parking an executor thread
+except ImportError:
+    async def ainput(prompt: str = "") -> str:
+        return await asyncio.get_running_loop().run_in_executor(None, input, prompt)
 
 HEADER = struct.Struct("!I")   # Define 4-byte length prefix format
+_HDR_UNPACK = HEADER.unpack    # Cached bound method for the per-frame unpack
+
+try:
+    import zstandard            # Optional: compress large frames
+except ImportError:
+    zstandard = None
+
+# Header layout: the low 31 bits are the payload length, the top bit flags compression
+FLAG_ZSTD = 0x8000_0000          # Payload is zstd-compressed
+LENGTH_MASK = 0x7FFF_FFFF
+COMPRESS_MIN = 1024              # Only compress payloads larger than this (bytes)
+MAX_FRAME = 10_000_000           # Largest payload accepted, compressed or not
+
+class FrameCodec:
+    """Per-connection zstd state for read_frame/write_frame.
+
+    Compression stays off until a HELLO exchange in which both sides report
+    zstd support, so older peers and peers without zstandard only ever see
+    plain length headers.
+    """
+    def __init__(self):
+        self.enabled = zstandard is not None
+        self.active = False              # Set once HELLO negotiated compression
+        if self.enabled:
+            self._cctx = zstandard.ZstdCompressor(level=1)   # Reused for the whole connection
+            self._dctx = zstandard.ZstdDecompressor()
+
+    def encode(self, data: bytes) -> Tuple[bytes, int]:
+        if self.active and len(data) > COMPRESS_MIN:
+            return self._cctx.compress(data), FLAG_ZSTD
+        return data, 0
+
+    def decode(self, word: int, data: bytes) -> bytes:
+        if word & FLAG_ZSTD:
+            if not self.active:
+                raise ValueError("compressed frame but compression was not negotiated")
+            size = zstandard.frame_content_size(data)
+            if size < 0 or size > MAX_FRAME:           # Unknown or too big once decompressed
+                raise ValueError("invalid compressed frame size")
+            data = self._dctx.decompress(data)
+        return data
+
+# The server drops clients idle for 300 s, so pooled connections
+# are discarded a bit earlier than that instead of being reused.
+POOL_IDLE_TIMEOUT = 240.0
+
+# Idle connections reused across requests: (host, port) -> (reader, writer, codec, last_used).
+# A connection is taken out of the pool while a request uses it, so concurrent
+# requests never share a socket; they open their own and the spare is closed.
+_CONN_POOL: Dict[Tuple[str, int], Tuple[asyncio.StreamReader, asyncio.StreamWriter, FrameCodec, float]] = {}
 
 # ---------------- Framing ----------------
 
-async def read_frame(reader: asyncio.StreamReader) -> Dict[str, Any]:
+async def read_frame(reader: asyncio.StreamReader, codec: Optional[FrameCodec] = None) -> Dict[str, Any]:
     hdr = await reader.readexactly(HEADER.size)     # Read 4 bytes for header
-    (length,) = HEADER.unpack(hdr)                 # Unpack length
-    data = await reader.readexactly(length)        # Read full payload
-    return json.loads(data.decode("utf-8"))        # Return JSON object
+    (word,) = _HDR_UNPACK(hdr)                     # Unpack flags + length
+    data = await reader.readexactly(word & LENGTH_MASK)   # Read full payload
+    if codec is not None:
+        data = codec.decode(word, data)            # Decompress if flagged
+    elif word & FLAG_ZSTD:
+        raise ValueError("compressed frame not expected")
+    return _loads(data)                            # Return JSON object
 
-async def write_frame(writer: asyncio.StreamWriter, payload: Dict[str, Any]) -> None:
-    data = json.dumps(payload, separators=(",", ":")).encode("utf-8")
-    writer.write(HEADER.pack(len(data)) + data)    # Prefix message with length
+async def write_frame(writer: asyncio.StreamWriter, payload: Dict[str, Any], codec: Optional[FrameCodec] = None) -> None:
+    data = _dumps(payload)                         # Serialize to JSON bytes
+    flags = 0
+    if codec is not None:
+        data, flags = codec.encode(data)           # Compress large payloads once negotiated
+    hdr = (len(data) | flags).to_bytes(4, "big")   # Big-endian length, same as HEADER.pack
+    writer.writelines((hdr, data))                 # Length prefix + payload, no concat copy
     await writer.drain()                           # Flush to network
 
 # ---------------- Request helpers ----------------
 
-async def send_request(host: str, port: int, payload: Dict[str, Any]):
-    reader, writer = await asyncio.open_connection(host, port) # Connect to server
+async def _get_connection(host: str, port: int) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter, FrameCodec]:
+    loop = asyncio.get_running_loop()
+    conn = _CONN_POOL.pop((host, port), None)      # Check out: nobody else can use it meanwhile
+    if conn is not None:
+        reader, writer, codec, last_used = conn
+        if not writer.is_closing() and not reader.at_eof() and loop.time() - last_used < POOL_IDLE_TIMEOUT:
+            return reader, writer, codec           # Reuse the cached connection
+        await _close(writer)                       # Stale: server may have dropped it
+    reader, writer = await asyncio.open_connection(host, port)  # Connect to server
+    sock = writer.get_extra_info("socket")
+    if sock is not None:
+        # asyncio already sets TCP_NODELAY on TCP sockets; keepalive is the only option we add
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)  # Detect dead pooled connections
+    codec = FrameCodec()
+    if codec.enabled:                              # Offer compression; older servers answer "unknown cmd"
+        try:
+            await write_frame(writer, {"cmd": "HELLO", "zstd": True})
+            resp = await read_frame(reader)
+        except BaseException:
+            await _close(writer)
+            raise
+        codec.active = bool(resp.get("ok") and resp.get("zstd"))
+    return reader, writer, codec
+
+async def _release(host: str, port: int, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, codec: FrameCodec) -> None:
+    if (host, port) in _CONN_POOL:                 # Another request already returned one: keep a single spare
+        await _close(writer)
+    else:
+        _CONN_POOL[(host, port)] = (reader, writer, codec, asyncio.get_running_loop().time())
+
+async def _close(writer: asyncio.StreamWriter) -> None:
+    writer.close()                                 # Close socket
     try:
-        await write_frame(writer, payload)         # Send request
-        resp = await read_frame(reader)            # Wait for reply
+        await writer.wait_closed()
+    except Exception:
+        pass
+
+async def close_pool() -> None:
+    """Close every pooled connection (call before the event loop shuts down)."""
+    while _CONN_POOL:
+        _, (_, writer, _, _) = _CONN_POOL.popitem()
+        await _close(writer)
+
+async def send_request(host: str, port: int, payload: Dict[str, Any]):
+    for attempt in range(2):                       # Retry once on a broken pooled connection
+        reader, writer, codec = await _get_connection(host, port)
+        try:
+            await write_frame(writer, payload, codec)   # Send request
+            resp = await read_frame(reader, codec)      # Wait for reply
+        except (ConnectionError, asyncio.IncompleteReadError):
+            await _close(writer)
+            if attempt:
+                raise
+            continue
+        except BaseException:
+            await _close(writer)                   # Connection state unknown, don't reuse it
+            raise
+        await _release(host, port, reader, writer, codec)
         return resp
+
+async def _run_and_close(coro):
+    try:
+        return await coro
     finally:
-        writer.close()                             # Close socket
-        await writer.wait_closed()
+        await close_pool()                         # Close pooled sockets before the loop ends
+
+PROMPT = "> "
 
 # Interactive client loop
 async def interactive(host: str, port: int):
     print("Commands: PING | LOAN <username> <amount> <years> <rate> | SET <k> <v...> | GET <k> | DEL <k> | KEYS | CLEAR | EXIT")
-    loop = asyncio.get_running_loop()
     while True:
-        line = await loop.run_in_executor(None, lambda: input('> ').strip())  # Get user input
+        line = (await ainput(PROMPT)).strip()        # Get user input
         if not line:
             continue
-        parts = line.split()
-        cmd = parts[0].upper()                       # First word = command
+        first, *tail = line.split(maxsplit=1)        # Split off the command only (any whitespace)
+        cmd = first.upper()                          # First word = command
+        rest = tail[0] if tail else ""
         if cmd in {"EXIT", "QUIT"}:                 # Exit commands
             print("bye")
             return
         try:
             if cmd == "PING":
                 payload = {"cmd": "PING"}
-            elif cmd == "LOAN" and len(parts) == 5:
-                _, username, amount, years, rate = parts
+            elif cmd == "LOAN" and len(args := rest.split(maxsplit=4)) == 4:
+                username, amount, years, rate = args
                 payload = {
                     "cmd": "LOAN",
                     "username": username,
@@ -59,17 +202,16 @@ async def interactive(host: str, port: int):
                     "years": int(years),
                     "annual_rate": float(rate),
                 }
-            elif cmd == "SET" and len(parts) >= 3:
-                key = parts[1]
-                value = " ".join(parts[2:])
+            elif cmd == "SET" and len(args := rest.split(maxsplit=1)) == 2:
+                key, value = args                    # Value is the rest of the line, spacing kept
                 payload = {"cmd": "SET", "key": key, "value": value}
-            elif cmd == "GET" and len(parts) == 2:
-                payload = {"cmd": "GET", "key": parts[1]}
-            elif cmd == "DEL" and len(parts) == 2:
-                payload = {"cmd": "DEL", "key": parts[1]}
-            elif cmd == "KEYS" and len(parts) == 1:
+            elif cmd == "GET" and len(rest.split()) == 1:
+                payload = {"cmd": "GET", "key": rest}
+            elif cmd == "DEL" and len(rest.split()) == 1:
+                payload = {"cmd": "DEL", "key": rest}
+            elif cmd == "KEYS" and not rest:
                 payload = {"cmd": "KEYS"}
-            elif cmd == "CLEAR" and len(parts) == 1:
+            elif cmd == "CLEAR" and not rest:
                 payload = {"cmd": "CLEAR"}
             else:
                 print("Unknown/invalid command.")
@@ -122,10 +264,10 @@ def parse_args():
 if __name__ == "__main__":
     args = parse_args()
     if args.mode == "loan":
-        asyncio.run(loan_oneshot(args.host, args.port, args.username, args.amount, args.years, args.rate))
+        asyncio.run(_run_and_close(loan_oneshot(args.host, args.port, args.username, args.amount, args.years, args.rate)))
     elif args.mode == "get":
-        asyncio.run(kv_get_oneshot(args.host, args.port, args.key))
+        asyncio.run(_run_and_close(kv_get_oneshot(args.host, args.port, args.key)))
     elif args.mode == "ping":
-        asyncio.run(ping_oneshot(args.host, args.port))
+        asyncio.run(_run_and_close(ping_oneshot(args.host, args.port)))
     else:
-        asyncio.run(interactive(args.host, args.port))
\ No newline at end of file
+        asyncio.run(_run_and_close(interactive(args.host, args.port)))
\ No newline at end of file
@@ -4,18 +4,88 @@ Async TCP Service (server)
 import argparse                 # For parsing command-line arguments
 import asyncio                  # For asynchronous sockets and tasks
 import json                     # For encoding/decoding JSON messages
+import multiprocessing          # For running several server worker processes
+import os                       # For the CPU count
 import signal                   # For handling Ctrl+C shutdown signals
+import socket                   # For TCP socket options
 import struct                   # For packing/unpacking binary message length headers
-from datetime import datetime, timezone   # For timestamps in logs
-from typing import Any, Dict, Tuple       # For type hints
+import sys                      # For reporting log write errors
+import time                     # For log timestamps
+from functools import lru_cache # For memoizing repeated loan calculations
+from typing import Any, Dict, List, Optional, Tuple   # For type hints
+
+def _json_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+try:
+    import orjson               # Optional: faster JSON encoding, returns bytes directly
+except ImportError:
+    _dumps = _json_dumps
+else:
+    def _dumps(obj: Any) -> bytes:
+        try:
+            data = orjson.dumps(obj)
+        except TypeError:       # Ints over 64 bits, non-str keys...: the stdlib handles them
+            return _json_dumps(obj)
+        if b"null" in data:     # orjson writes NaN/Infinity as null; let the stdlib keep them
+            return _json_dumps(obj)
+        return data
+
+# Decoding always uses the stdlib: orjson would turn big ints into floats and reject NaN
+_loads = json.loads             # json.loads also accepts UTF-8 bytes
 
 # Create a struct to pack/unpack 4-byte big-endian integers (message length headers)
 HEADER = struct.Struct("!I")
+_HDR_UNPACK = HEADER.unpack      # Bound method cached to skip the attribute lookup per frame
+
+try:
+    import zstandard            # Optional: compress large frames
+except ImportError:
+    zstandard = None
+
+# Header layout: the low 31 bits are the payload length, the top bit flags compression
+FLAG_ZSTD = 0x8000_0000          # Payload is zstd-compressed
+LENGTH_MASK = 0x7FFF_FFFF
+COMPRESS_MIN = 1024              # Only compress payloads larger than this (bytes)
+MAX_FRAME = 10_000_000           # Largest payload accepted, compressed or not
+
+class FrameCodec:
+    """Per-connection zstd state for read_frame/write_frame.
+
+    Compression stays off until a HELLO exchange in which both sides report
+    zstd support, so older peers and peers without zstandard only ever see
+    plain length headers.
+    """
+    def __init__(self):
+        self.enabled = zstandard is not None
+        self.active = False              # Set once HELLO negotiated compression
+        if self.enabled:
+            self._cctx = zstandard.ZstdCompressor(level=1)   # Reused for the whole connection
+            self._dctx = zstandard.ZstdDecompressor()
+
+    def encode(self, data: bytes) -> Tuple[bytes, int]:
+        if self.active and len(data) > COMPRESS_MIN:
+            return self._cctx.compress(data), FLAG_ZSTD
+        return data, 0
+
+    def decode(self, word: int, data: bytes) -> bytes:
+        if word & FLAG_ZSTD:
+            if not self.active:
+                raise ValueError("compressed frame but compression was not negotiated")
+            size = zstandard.frame_content_size(data)
+            if size < 0 or size > MAX_FRAME:           # Unknown or too big once decompressed
+                raise ValueError("invalid compressed frame size")
+            data = self._dctx.decompress(data)
+        return data
+
+try:
+    import numpy as np          # Optional: vectorized batch LOAN requests
+except ImportError:
+    np = None
 
 # ---------------- Loan math ----------------
 
-def calculate_payments(loan_amount: float, years: int, annual_rate: float) -> Tuple[float, float]:
-    """Calculate monthly and total payments."""
+def _calc_scalar(loan_amount: float, years: int, annual_rate: float) -> Tuple[float, float]:
     monthly_rate = (annual_rate / 100.0) / 12.0     # Convert annual rate (percent) to monthly decimal
     total_payments = years * 12                     # Number of months = years × 12
     if monthly_rate == 0:                           # Handle zero-interest loans
@@ -24,176 +94,471 @@ def calculate_payments(loan_amount: float, years: int, annual_rate: float) -> Tu
         # Amortization formula for monthly loan repayment
         monthly_payment = (loan_amount * monthly_rate) / (1 - (1 / (1 + monthly_rate)) ** total_payments)
     total_payment = monthly_payment * total_payments  # Multiply by number of months to get total
+    return monthly_payment, total_payment
+
+def _calc_array(loan_amounts, years, annual_rates):
+    """NumPy version of _calc_scalar over equal-length arrays (unrounded).
+
+    Also returns a mask of the entries computed without any non-finite
+    intermediate; the others must go through the scalar path instead.
+    """
+    monthly_rate = (annual_rates / 100.0) / 12.0
+    total_payments = years * 12
+    zero = monthly_rate == 0                        # Handle zero-interest loans
+    # Float errors are not ignored here: every entry they touch is flagged below
+    with np.errstate(all="ignore"):
+        growth = np.where(zero, 1.0, (1 / (1 + monthly_rate)) ** total_payments)
+        monthly_payment = np.where(
+            zero,
+            loan_amounts / total_payments,
+            (loan_amounts * monthly_rate) / (1 - growth),
+        )
+        total_payment = monthly_payment * total_payments
+        denominator = np.where(zero, total_payments, 1 - growth)
+    clean = (np.isfinite(growth) & (denominator != 0)
+             & np.isfinite(monthly_payment) & np.isfinite(total_payment))
+    return monthly_payment, total_payment, clean
+
+@lru_cache(maxsize=65536)
+def calculate_payments(loan_amount: float, years: int, annual_rate: float) -> Tuple[float, float]:
+    """Calculate monthly and total payments.
+
+    Memoized on the exact (loan_amount, years, annual_rate) values; callers that
+    want nearby inputs to share a cache entry should round them before calling.
+    """
+    monthly_payment, total_payment = _calc_scalar(loan_amount, years, annual_rate)
     return round(monthly_payment, 2), round(total_payment, 2)
 
+def _calc_zero(loan_amount: float, years: int) -> Tuple[float, float]:
+    """calculate_payments() specialized for annual_rate == 0: no rate math, no cache lookup."""
+    total_payments = years * 12
+    monthly_payment = loan_amount / total_payments
+    return round(monthly_payment, 2), round(monthly_payment * total_payments, 2)   # Same rounding as the general path
+
+def calculate_payments_batch(loan_amounts: List[float], years: List[int], annual_rates: List[float]) -> Tuple[List[float], List[float]]:
+    """Calculate monthly and total payments for equal-length lists of loans.
+
+    Results and errors are the same as calling calculate_payments() on each
+    loan in order: the first loan that fails fails the whole batch.
+    """
+    if not (len(loan_amounts) == len(years) == len(annual_rates)):
+        raise ValueError("loan_amount, years and annual_rate lists must have the same length")
+    if np is None:                                  # No numpy: one scalar call per loan
+        results = [calculate_payments(float(a), int(y), float(r)) for a, y, r in zip(loan_amounts, years, annual_rates)]
+        return [m for m, _ in results], [t for _, t in results]
+    la = np.asarray(loan_amounts, dtype=np.float64)
+    yr = np.asarray(years, dtype=np.int64)
+    ar = np.asarray(annual_rates, dtype=np.float64)
+    monthly, total, clean = _calc_array(la, yr, ar)
+    # Round with Python's round() so batch results match the scalar path exactly
+    monthly = [round(m, 2) for m in monthly.tolist()]
+    total = [round(t, 2) for t in total.tolist()]
+    # Entries that hit a division by zero, an overflow or an inf/nan are redone by the
+    # scalar path, so they raise (or return inf/nan) exactly as a single LOAN would
+    for i in np.flatnonzero(~clean).tolist():
+        monthly[i], total[i] = calculate_payments(float(la[i]), int(yr[i]), float(ar[i]))
+    return monthly, total
+
 # ---------------- File logger ----------------
 
 class JsonlLogger:
-    """Thread-safe logger that appends JSON lines to a file."""
+    """Logger that appends JSON lines to a file from a background task.
+
+    log() only enqueues the record; one consumer task takes queued records in
+    batches and serializes and writes each batch with a single call in a
+    worker thread, so requests never wait on disk I/O.
+    """
+    QUEUE_SIZE = 10_000                    # Pending records before log() starts to wait
+    MAX_BATCH = 1_000                      # Records written per file write at most
+
     def __init__(self, path: str):
         self.path = path                   # Path to log file (set via --log argument)
-        self._lock = asyncio.Lock()        # Lock to prevent race conditions when multiple clients log
+        # Kept open for the server's lifetime. Unbuffered: lines are already batched in memory,
+        # so each flush is a single O_APPEND write and workers sharing the file don't interleave.
+        self._fh = open(path, "ab", buffering=0)
+        self._q: asyncio.Queue = asyncio.Queue(maxsize=self.QUEUE_SIZE)
+        self._task: Optional[asyncio.Task] = None
 
-    async def log(self, record: Dict[str, Any]) -> None:
-        line = json.dumps(record, separators=(",", ":"), ensure_ascii=False)   # Serialize dict as compact JSON string
-        async with self._lock:             # Ensure only one task writes at a time
-            await asyncio.to_thread(self._append_line, line)   # Offload file write to thread pool
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._writer())   # Start the background writer
 
-    def _append_line(self, line: str) -> None:
-        with open(self.path, "a", encoding="utf-8") as f:
-            f.write(line + "\n")           # Append JSON object as a line in the file
+    async def log(self, record: Dict[str, Any]) -> None:
+        try:
+            self._q.put_nowait(record)     # Fast path: never suspends
+        except asyncio.QueueFull:
+            await self._put(record)        # Writer is behind: apply backpressure rather than drop
+
+    async def close(self) -> None:
+        if self._task is not None:
+            if await self._put(None):      # Sentinel: writer flushes what is queued, then exits
+                await self._task
+            self._task = None
+        self._fh.close()
+
+    async def _put(self, item: Optional[Dict[str, Any]]) -> bool:
+        """Wait for queue space, but never on a writer that is gone. Returns False if dropped."""
+        if self._task is None or self._task.done():
+            return False                   # No consumer left: drop instead of blocking forever
+        put = asyncio.ensure_future(self._q.put(item))
+        await asyncio.wait({put, self._task}, return_when=asyncio.FIRST_COMPLETED)
+        if not put.done():                 # Writer stopped while we were waiting
+            put.cancel()
+            return False
+        return True
+
+    async def _writer(self) -> None:
+        while True:
+            record = await self._q.get()
+            batch = []
+            while record is not None:
+                batch.append(record)
+                if len(batch) >= self.MAX_BATCH or self._q.empty():
+                    break
+                record = self._q.get_nowait()
+            if batch:
+                try:
+                    await asyncio.to_thread(self._write, batch)   # Offload serialization + write
+                except Exception as e:     # Disk full, I/O error, unserializable record...
+                    print(f"log write failed, dropped {len(batch)} record(s): {e!r}", file=sys.stderr)
+            if record is None:
+                return
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        self._fh.write(b"".join([_dumps(record) + b"\n" for record in batch]))   # One write per batch
+
+# Log timestamps are formatted by hand from time.time_ns() instead of building an
+# aware datetime per request. The date/time-of-day prefix only changes once a
+# second, so it is cached and just the microseconds are formatted per call.
+_ts_sec = -1
+_ts_prefix = ""
+
+def utc_timestamp() -> str:
+    """Current UTC time as ISO 8601 with microseconds, like datetime.isoformat()."""
+    global _ts_sec, _ts_prefix
+    sec, ns = divmod(time.time_ns(), 1_000_000_000)
+    if sec != _ts_sec:                             # New second: rebuild the cached prefix
+        tm = time.gmtime(sec)
+        _ts_prefix = (f"{tm.tm_year:04d}-{tm.tm_mon:02d}-{tm.tm_mday:02d}"
+                      f"T{tm.tm_hour:02d}:{tm.tm_min:02d}:{tm.tm_sec:02d}.")
+        _ts_sec = sec
+    return f"{_ts_prefix}{ns // 1000:06d}+00:00"
 
 # ---------------- Framing ----------------
 
-async def read_frame(reader: asyncio.StreamReader) -> Dict[str, Any]:
+_TAKE_BYTES = getattr(bytearray, "take_bytes", None)   # Python 3.15+ only
+
+class FrameProtocol(asyncio.Protocol):
+    """Lean replacement for the StreamReader/StreamWriter pair on the server.
+
+    Incoming bytes accumulate in one bytearray; readexactly() slices frames out
+    of it (zero-copy with bytearray.take_bytes on Python 3.15+). Exposes the
+    small subset of the StreamReader/StreamWriter API that the framing code uses.
+    """
+    HIGH_WATER = 1 << 17               # Pause the socket when this much is buffered and unread
+
+    def __init__(self, handler):
+        self._handler = handler        # Coroutine function run once per connection
+        self._buf = bytearray()        # Received but not yet consumed bytes
+        self._eof = False
+        self._exc: Optional[BaseException] = None
+        self._read_waiter: Optional[asyncio.Future] = None
+        self._drain_waiter: Optional[asyncio.Future] = None
+        self._write_paused = False
+        self._read_paused = False
+        self._closed: Optional[asyncio.Future] = None
+        self._transport: Optional[asyncio.Transport] = None
+        self._task: Optional[asyncio.Task] = None
+
+    # -- asyncio.Protocol callbacks --
+
+    def connection_made(self, transport):
+        self._transport = transport
+        loop = asyncio.get_running_loop()
+        self._closed = loop.create_future()
+        self._task = loop.create_task(self._handler(self))   # Serve this client
+
+    def data_received(self, data):
+        self._buf += data
+        self._wake_reader()
+        if len(self._buf) > self.HIGH_WATER and not self._read_paused:
+            self._read_paused = True   # Consumer is behind: stop reading from the socket
+            self._transport.pause_reading()
+
+    def eof_received(self):
+        self._eof = True
+        self._wake_reader()
+        return True                    # Half-close: keep the transport open so replies can still
+                                       # be written; handle_client closes it when done
+
+    def connection_lost(self, exc):
+        self._eof = True
+        self._exc = exc
+        self._wake_reader()
+        if self._drain_waiter is not None and not self._drain_waiter.done():
+            self._drain_waiter.set_exception(exc or ConnectionResetError("connection lost"))
+        if not self._closed.done():
+            self._closed.set_result(None)
+
+    def pause_writing(self):
+        self._write_paused = True
+
+    def resume_writing(self):
+        self._write_paused = False
+        if self._drain_waiter is not None and not self._drain_waiter.done():
+            self._drain_waiter.set_result(None)
+
+    def _wake_reader(self):
+        if self._read_waiter is not None and not self._read_waiter.done():
+            self._read_waiter.set_result(None)
+
+    # -- reader side --
+
+    async def readexactly(self, n: int) -> bytes:
+        while len(self._buf) < n:
+            if self._eof:
+                partial = bytes(self._buf)
+                self._buf.clear()
+                raise asyncio.IncompleteReadError(partial, n)
+            if self._read_paused:      # Need more data than is buffered: resume the socket
+                self._read_paused = False
+                self._transport.resume_reading()
+            self._read_waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self._read_waiter
+            finally:
+                self._read_waiter = None
+        if _TAKE_BYTES is not None:
+            data = _TAKE_BYTES(self._buf, n)           # Python 3.15+: no copy when taking it all
+        else:
+            data = bytes(memoryview(self._buf)[:n])
+            del self._buf[:n]
+        return data
+
+    # -- writer side --
+
+    def get_extra_info(self, name: str, default=None):
+        return self._transport.get_extra_info(name, default)
+
+    def write(self, data) -> None:
+        self._transport.write(data)
+
+    def writelines(self, chunks) -> None:
+        self._transport.writelines(chunks)
+
+    async def drain(self) -> None:
+        if self._transport.is_closing():
+            raise self._exc or ConnectionResetError("connection lost")
+        if self._write_paused:         # Transport buffer is full: wait for resume_writing()
+            self._drain_waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self._drain_waiter
+            finally:
+                self._drain_waiter = None
+
+    def close(self) -> None:
+        self._transport.close()
+
+    async def wait_closed(self) -> None:
+        await self._closed
+
+async def read_frame(reader: FrameProtocol, codec: Optional[FrameCodec] = None) -> Dict[str, Any]:
     hdr = await reader.readexactly(HEADER.size)      # Read exactly 4 bytes (the header)
-    (length,) = HEADER.unpack(hdr)                  # Extract message length
-    if length < 0 or length > 10_000_000:           # Prevent abuse (too big frame)
+    (word,) = _HDR_UNPACK(hdr)                      # Extract flags + message length
+    length = word & LENGTH_MASK
+    if length > MAX_FRAME:                          # Prevent abuse (too big frame)
         raise ValueError("invalid frame length")
     data = await reader.readexactly(length)         # Read exact payload bytes
-    return json.loads(data.decode("utf-8"))         # Decode JSON string into Python dict
-
-async def write_frame(writer: asyncio.StreamWriter, payload: Dict[str, Any]) -> None:
-    data = json.dumps(payload, separators=(",", ":")).encode("utf-8")  # Serialize dict to JSON bytes
-    writer.write(HEADER.pack(len(data)) + data)      # Prefix with 4-byte length header
+    if codec is not None:
+        data = codec.decode(word, data)             # Decompress if flagged
+    elif word & FLAG_ZSTD:
+        raise ValueError("compressed frame not expected")
+    return _loads(data)                             # Decode JSON bytes into Python dict
+
+async def write_frame(writer: FrameProtocol, payload: Dict[str, Any], codec: Optional[FrameCodec] = None) -> None:
+    data = _dumps(payload)                          # Serialize dict to JSON bytes
+    flags = 0
+    if codec is not None:
+        data, flags = codec.encode(data)            # Compress large payloads once negotiated
+    hdr = (len(data) | flags).to_bytes(4, "big")    # Same bytes as HEADER.pack, without the tuple/lookup
+    writer.writelines((hdr, data))                  # 4-byte length header + payload, no concat copy
     await writer.drain()                            # Ensure bytes are sent out
 
 # ---------------- Server core ----------------
 
 class KVStore:
-    """Simple in-memory key-value store."""
+    """Simple in-memory key-value store.
+
+    No lock needed: all access happens on one event loop and no method awaits
+    while touching the dict. Methods stay async to keep the API unchanged.
+    """
     def __init__(self):
         self._data: Dict[str, Any] = {}            # Dictionary to store key-value pairs
-        self._lock = asyncio.Lock()                # Async lock to ensure safe access
 
     async def set(self, key: str, value: Any) -> Dict[str, Any]:
-        async with self._lock:
-            self._data[key] = value
+        self._data[key] = value
         return {"ok": True}
 
     async def get(self, key: str) -> Dict[str, Any]:
-        async with self._lock:
-            if key not in self._data:
-                return {"ok": False, "error": "not found"}
-            return {"ok": True, "value": self._data[key]}
+        if key not in self._data:
+            return {"ok": False, "error": "not found"}
+        return {"ok": True, "value": self._data[key]}
 
     async def delete(self, key: str) -> Dict[str, Any]:
-        async with self._lock:
-            existed = self._data.pop(key, None) is not None
+        existed = self._data.pop(key, None) is not None
         return {"ok": True, "deleted": existed}
 
     async def keys(self) -> Dict[str, Any]:
-        async with self._lock:
-            return {"ok": True, "keys": list(self._data.keys())}
+        return {"ok": True, "keys": list(self._data)}
 
     async def clear(self) -> Dict[str, Any]:
-        async with self._lock:
-            self._data.clear()
+        self._data.clear()
         return {"ok": True}
 
-# Handle one client connection (called for each client)
-async def handle_client(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, logger: JsonlLogger, store: KVStore):
-    peer = writer.get_extra_info("peername") or ("?", 0)  # Get client IP and port
-    client_ip, client_port = str(peer[0]), int(peer[1])
-    try:
-        while True:
-            try:
-                req = await asyncio.wait_for(read_frame(reader), timeout=300)  # Wait for request, with idle timeout
-            except asyncio.TimeoutError:
-                resp = {"ok": False, "error": "idle timeout"}  # If idle too long, send timeout error
-                await write_frame(writer, resp)
-                await logger.log({        # Log timeout event
-                    "ts_utc": datetime.now(timezone.utc).isoformat(),
-                    "peer": {"ip": client_ip, "port": client_port},
-                    "event": "timeout",
-                    "response": resp,
-                })
-                break
-            except asyncio.IncompleteReadError:
-                break    # Client closed connection
-            except Exception as e:
-                resp = {"ok": False, "error": str(e)}  # Catch any parsing/decoding errors
-                await write_frame(writer, resp)
-                await logger.log({        # Log the error
-                    "ts_utc": datetime.now(timezone.utc).isoformat(),
-                    "peer": {"ip": client_ip, "port": client_port},
-                    "event": "read_error",
-                    "error": str(e),
-                })
-                continue
+# ---------------- Command handlers ----------------
+# Each handler takes (request, store) and returns the response dict.
 
-            cmd = (req.get("cmd") or "").upper()   # Extract the "cmd" field
+async def _h_ping(req: Dict[str, Any], store: KVStore) -> Dict[str, Any]:
+    return {"ok": True, "reply": "PONG"}
 
-            # Dispatch by command type
-            if cmd == "PING":
-                response = {"ok": True, "reply": "PONG"}
+async def _h_loan(req: Dict[str, Any], store: KVStore) -> Dict[str, Any]:
+    try:
+        username = str(req.get("username") or "")
+        if isinstance(req["loan_amount"], list):   # Batch: lists of loans, one result each
+            monthly, total = calculate_payments_batch(req["loan_amount"], req["years"], req["annual_rate"])
+        else:
+            loan_amount = float(req["loan_amount"])
+            years = int(req["years"])
+            annual_rate = float(req["annual_rate"])
+            if annual_rate == 0.0:                 # Zero-interest promotions: skip the amortization path
+                monthly, total = _calc_zero(loan_amount, years)
+            else:
+                monthly, total = calculate_payments(loan_amount, years, annual_rate)
+        return {"ok": True, "monthly_payment": monthly, "total_payment": total}
+    except KeyError as e:
+        return {"ok": False, "error": f"missing field: {e}"}
+    except Exception as e:
+        return {"ok": False, "error": str(e)}
+
+async def _h_set(req: Dict[str, Any], store: KVStore) -> Dict[str, Any]:
+    key = req.get("key")
+    if key is None or "value" not in req:
+        return {"ok": False, "error": "SET requires 'key' and 'value'"}
+    return await store.set(str(key), req["value"])
+
+async def _h_get(req: Dict[str, Any], store: KVStore) -> Dict[str, Any]:
+    key = req.get("key")
+    if key is None:
+        return {"ok": False, "error": "GET requires 'key'"}
+    return await store.get(str(key))
+
+async def _h_del(req: Dict[str, Any], store: KVStore) -> Dict[str, Any]:
+    key = req.get("key")
+    if key is None:
+        return {"ok": False, "error": "DEL requires 'key'"}
+    return await store.delete(str(key))
+
+async def _h_keys(req: Dict[str, Any], store: KVStore) -> Dict[str, Any]:
+    return await store.keys()
+
+async def _h_clear(req: Dict[str, Any], store: KVStore) -> Dict[str, Any]:
+    return await store.clear()
+
+# Command name -> handler, looked up once per request
+_DISPATCH = {
+    "PING": _h_ping,
+    "LOAN": _h_loan,
+    "SET": _h_set,
+    "GET": _h_get,
+    "DEL": _h_del,
+    "KEYS": _h_keys,
+    "CLEAR": _h_clear,
+}
+_KNOWN = frozenset(_DISPATCH) | {"HELLO"}   # Command names as clients normally send them (already uppercase)
+
+IDLE_TIMEOUT = 300.0    # Seconds a client may stay silent before it is disconnected
 
-            elif cmd == "LOAN":
+# Handle one client connection (called for each client)
+async def handle_client(conn: FrameProtocol, logger: JsonlLogger, store: KVStore):
+    peer = conn.get_extra_info("peername") or ("?", 0)  # Get client IP and port
+    client_ip, client_port = str(peer[0]), int(peer[1])
+    codec = FrameCodec()                      # Compression state for this connection
+    loop = asyncio.get_running_loop()
+    try:
+        # One idle deadline for the whole connection, instead of a wait_for() per frame
+        async with asyncio.timeout(IDLE_TIMEOUT) as idle:
+            while True:
                 try:
-                    username = str(req.get("username") or "")
-                    loan_amount = float(req["loan_amount"])
-                    years = int(req["years"])
-                    annual_rate = float(req["annual_rate"])
-                    monthly, total = calculate_payments(loan_amount, years, annual_rate)
-                    response = {"ok": True, "monthly_payment": monthly, "total_payment": total}
-                except KeyError as e:
-                    response = {"ok": False, "error": f"missing field: {e}"}
+                    req = await read_frame(conn, codec)   # Wait for request (idle deadline set below)
+                except asyncio.IncompleteReadError:
+                    break    # Client closed connection
                 except Exception as e:
-                    response = {"ok": False, "error": str(e)}
-
-            elif cmd == "SET":
-                key = req.get("key")
-                if key is None or "value" not in req:
-                    response = {"ok": False, "error": "SET requires 'key' and 'value'"}
+                    resp = {"ok": False, "error": str(e)}  # Catch any parsing/decoding errors
+                    await write_frame(conn, resp, codec)
+                    await logger.log({        # Log the error
+                        "ts_utc": utc_timestamp(),
+                        "peer": {"ip": client_ip, "port": client_port},
+                        "event": "read_error",
+                        "error": str(e),
+                    })
+                    continue
+                finally:
+                    # Client was active: push the idle deadline back. Only move it once it
+                    # is a second stale, so busy connections don't re-arm a timer per frame.
+                    deadline = loop.time() + IDLE_TIMEOUT
+                    if not idle.expired() and deadline - idle.when() >= 1.0:
+                        idle.reschedule(deadline)
+
+                raw = req.get("cmd")                    # Extract the "cmd" field
+                if type(raw) is str:
+                    cmd = raw if raw in _KNOWN else raw.upper()   # Only uppercase when needed
                 else:
-                    response = await store.set(str(key), req["value"])
-
-            elif cmd == "GET":
-                key = req.get("key")
-                if key is None:
-                    response = {"ok": False, "error": "GET requires 'key'"}
+                    cmd = str(raw) if raw else ""       # Not a string: reported as an unknown cmd
+                handler = _DISPATCH.get(cmd)            # Dispatch by command type
+                if cmd == "HELLO":                      # Per-connection compression handshake
+                    codec.active = codec.enabled and req.get("zstd") is True
+                    response = {"ok": True, "zstd": codec.active}
+                elif handler is None:
+                    response = {"ok": False, "error": f"unknown cmd: {cmd}"}
                 else:
-                    response = await store.get(str(key))
-
-            elif cmd == "DEL":
-                key = req.get("key")
-                if key is None:
-                    response = {"ok": False, "error": "DEL requires 'key'"}
-                else:
-                    response = await store.delete(str(key))
-
-            elif cmd == "KEYS":
-                response = await store.keys()
-
-            elif cmd == "CLEAR":
-                response = await store.clear()
+                    response = await handler(req, store)
 
-            else:
-                response = {"ok": False, "error": f"unknown cmd: {cmd}"}
-
-            # Send response back to client
-            await write_frame(writer, response)
-            # Log the request and response
-            await logger.log({
-                "ts_utc": datetime.now(timezone.utc).isoformat(),
-                "peer": {"ip": client_ip, "port": client_port},
-                "request": req,
-                "response": response,
-            })
+                # Send response back to client
+                await write_frame(conn, response, codec)
+                # Log the request and response
+                await logger.log({
+                    "ts_utc": utc_timestamp(),
+                    "peer": {"ip": client_ip, "port": client_port},
+                    "request": req,
+                    "response": response,
+                })
 
+    except TimeoutError:
+        resp = {"ok": False, "error": "idle timeout"}  # If idle too long, send timeout error
+        await write_frame(conn, resp, codec)
+        await logger.log({        # Log timeout event
+            "ts_utc": utc_timestamp(),
+            "peer": {"ip": client_ip, "port": client_port},
+            "event": "timeout",
+            "response": resp,
+        })
     finally:
-        writer.close()                        # Ensure socket is closed
+        conn.close()                          # Ensure socket is closed
         try:
-            await writer.wait_closed()        # Wait until it’s fully closed
+            await conn.wait_closed()        # Wait until it’s fully closed
         except Exception:
             pass
 
 # Start server, setup graceful shutdown
-async def run_server(host: str, port: int, log_path: str):
+async def run_server(host: str, port: int, log_path: str, reuse_port: bool = False):
     logger = JsonlLogger(log_path)    # Logger instance writing to local file
+    logger.start()
     store = KVStore()                 # Shared in-memory key-value store
 
-    server = await asyncio.start_server(lambda r, w: handle_client(r, w, logger, store), host, port)
+    loop = asyncio.get_running_loop()
+    server = await loop.create_server(
+        lambda: FrameProtocol(lambda conn: handle_client(conn, logger, store)), host, port,
+        reuse_port=reuse_port or None,   # SO_REUSEPORT lets several workers share the port
+    )
     addrs = ", ".join(str(s.getsockname()) for s in server.sockets)
     print(f"Serving on {addrs}")
 
@@ -202,7 +567,6 @@ async def run_server(host: str, port: int, log_path: str):
     def _graceful(*_):
         stop.set()                    # Set stop event on SIGINT/SIGTERM
 
-    loop = asyncio.get_running_loop()
     for sig in (getattr(signal, "SIGINT", None), getattr(signal, "SIGTERM", None)):
         if sig is not None:
             try:
@@ -210,9 +574,12 @@ async def run_server(host: str, port: int, log_path: str):
             except NotImplementedError:
                 pass
 
-    async with server:
-        await stop.wait()             # Keep server alive until stop event is set
-        print("Shutting down...")
+    try:
+        async with server:
+            await stop.wait()         # Keep server alive until stop event is set
+            print("Shutting down...")
+    finally:
+        await logger.close()          # Flush buffered log lines and close the file
 
 # ---------------- Entrypoint ----------------
 
@@ -222,8 +589,53 @@ def parse_args():
     p.add_argument("--port", type=int, default=13000, help="port number")
     # <<< CHANGE THIS PATH to where you want logs saved locally >>>
     p.add_argument("--log", default=r"C:\Users\pg84s\GitHub\Socket-Client-Server-Loan-Calculator\server_logs.jsonl", help="path to JSON Lines log file")
+    p.add_argument("--workers", type=_non_negative_int, default=1,
+                   help="worker processes (0 = one per CPU, Linux only); each worker has its own KV store")
     return p.parse_args()
 
+def _non_negative_int(value: str) -> int:
+    n = int(value)
+    if n < 0:
+        raise argparse.ArgumentTypeError("must be 0 or a positive integer")
+    return n
+
+# Run one server (one event loop) in the current process
+def serve(host: str, port: int, log_path: str, reuse_port: bool = False):
+    try:
+        import uvloop           # Optional: faster event loop, if installed
+        loop_factory = uvloop.new_event_loop
+    except ImportError:
+        loop_factory = None     # Fall back to the default asyncio loop
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        runner.run(run_server(host, port, log_path, reuse_port))
+
 if __name__ == "__main__":
     args = parse_args()
-    asyncio.run(run_server(args.host, args.port, args.log))
\ No newline at end of file
+    workers = args.workers or os.cpu_count() or 1
+    # Only Linux balances accepts across SO_REUSEPORT listeners; elsewhere extra workers sit idle
+    if workers > 1 and not (sys.platform.startswith("linux") and hasattr(socket, "SO_REUSEPORT")):
+        print("Multiple workers need Linux SO_REUSEPORT, running a single worker")
+        workers = 1
+    if workers == 1:
+        serve(args.host, args.port, args.log)
+    else:
+        # Each worker binds the same port; the kernel spreads new connections across them
+        procs = [multiprocessing.Process(target=serve, args=(args.host, args.port, args.log, True))
+                 for _ in range(workers)]
+
+        def _stop_workers(*_):
+            for proc in procs:
+                if proc.is_alive():
+                    proc.terminate()    # Workers shut down gracefully on SIGTERM
+
+        # Forward both signals: a SIGINT sent to the parent alone (kill -INT) never reaches
+        # the workers, unlike Ctrl+C in a terminal, which hits the whole process group
+        try:
+            for proc in procs:
+                proc.start()            # Started first so workers don't inherit the handlers below
+            signal.signal(signal.SIGTERM, _stop_workers)
+            signal.signal(signal.SIGINT, _stop_workers)
+        except KeyboardInterrupt:       # Interrupted while still starting workers
+            _stop_workers()
+        for proc in procs:
+            proc.join()
\ No newline at end of file